@@ -10,47 +10,142 @@ Usage:
     python cleanup_packages.py --global --confirm
 """
 
+import asyncio
 import subprocess
 import sys
+import os
 import argparse
+import functools
 import json
-from typing import List, Set, Dict
+from concurrent.futures import ThreadPoolExecutor
+from importlib.metadata import distributions
+from typing import List, Set, FrozenSet, Dict, Optional, Tuple
+
+# Run pip through the current interpreter instead of whatever `pip` is on PATH
+PIP_CMD = [sys.executable, '-m', 'pip']
+
+# Banner separators used by the report output
+_SEP = '=' * 60
+_SUBSEP = '-' * 40
+
+# Whether this interpreter runs inside a virtual environment (legacy
+# virtualenv sets sys.real_prefix, venv changes sys.prefix)
+IN_VENV = bool(getattr(sys, 'real_prefix', None)) or sys.base_prefix != sys.prefix
 
 # Essential packages that should NOT be removed
-ESSENTIAL_PACKAGES = {
+ESSENTIAL_PACKAGES = frozenset({
     'pip', 'setuptools', 'wheel', 'distlib', 'packaging', 'pyobjc-core',
     'certifi', 'urllib3', 'charset-normalizer', 'idna', 'requests',
     'six', 'python-dateutil', 'pytz', 'platformdirs', 'virtualenv'
-}
+})
 
-# Function to get macOS packages dynamically
-def get_macos_system_packages() -> Set[str]:
-    """Gets pyobjc packages installed dynamically."""
+# Installed packages (lowercase name -> version), shared by every lookup in a run
+_installed_cache: Optional[Dict[str, str]] = None
+
+
+# Installed packages persisted between runs, keyed by environment prefix
+CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'cleanup_packages.json')
+
+
+def _get_environment_fingerprint() -> List[List]:
+    """Returns the mtimes of the sys.path directories packages are installed in."""
+    # sys.path[0] is the script directory (or the cwd under -c/-m), which
+    # depends on how the script is launched rather than on the environment
+    paths = sys.path if getattr(sys.flags, 'safe_path', False) else sys.path[1:]
+    fingerprint = []
+    for path in paths:
+        if not path or not os.path.isdir(path):
+            continue
+        try:
+            fingerprint.append([path, os.stat(path).st_mtime_ns])
+        except OSError:
+            continue
+    return fingerprint
+
+
+def _is_package_dict(packages) -> bool:
+    """Checks that a cached value maps package name strings to version strings."""
+    return isinstance(packages, dict) and all(
+        isinstance(name, str) and isinstance(version, str)
+        for name, version in packages.items()
+    )
+
+
+def _load_cached_packages(fingerprint: List[List]) -> Optional[Dict[str, str]]:
+    """Reads this environment's packages from the cache file if still valid."""
     try:
-        result = run_command(['pip', 'list', '--format=json'])
-        if result and result.returncode == 0:
-            packages = json.loads(result.stdout)
-            return {
-                pkg['name'].lower() for pkg in packages 
-                if pkg['name'].lower().startswith('pyobjc-')
-            }
-    except:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            entry = json.load(f)[sys.prefix]
+        packages = entry['packages']
+        if entry['fingerprint'] == fingerprint and _is_package_dict(packages):
+            return packages
+    except (OSError, ValueError, KeyError, TypeError):
         pass
-    return set()
+    return None
+
+
+def _save_cached_packages(fingerprint: List[List], packages: Dict[str, str]) -> None:
+    """Stores this environment's packages, keeping other environments' entries."""
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict):
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+    cache[sys.prefix] = {'fingerprint': fingerprint, 'packages': packages}
+    
+    # Write to a temporary file first so readers never see a partial file
+    tmp_file = f"{CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, CACHE_FILE)
+    except OSError:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+
+
+def _invalidate_installed_packages() -> None:
+    """Discards the cached package lists so the next lookup sees current state."""
+    global _installed_cache
+    _installed_cache = None
+    get_macos_system_packages.cache_clear()
+    get_protected_packages.cache_clear()
+
+# Function to get macOS packages dynamically
+@functools.lru_cache(maxsize=1)
+def get_macos_system_packages() -> FrozenSet[str]:
+    """Gets pyobjc packages installed dynamically."""
+    # pyobjc only exists on macOS; elsewhere there is nothing to look for
+    if sys.platform != 'darwin':
+        return frozenset()
+    installed = get_installed_packages()
+    return frozenset(pkg for pkg in installed if pkg.startswith('pyobjc-'))
 
 # Function to get all protected packages
-def get_protected_packages() -> Set[str]:
-    """Combines essential packages with macOS packages."""
+@functools.lru_cache(maxsize=1)
+def get_protected_packages() -> FrozenSet[str]:
+    """Combines essential packages with macOS packages (lowercase names)."""
     macos_packages = get_macos_system_packages()
     return ESSENTIAL_PACKAGES.union(macos_packages)
 
 
-def run_command(cmd: List[str], capture_output: bool = True) -> subprocess.CompletedProcess:
+def run_command(
+    cmd: List[str],
+    capture_output: bool = True,
+    env: Optional[Dict[str, str]] = None
+) -> subprocess.CompletedProcess:
     """Executes command and returns result."""
     try:
         return subprocess.run(
             cmd, 
             capture_output=capture_output, 
+            stdin=subprocess.DEVNULL,
+            env=env,
             text=True, 
             check=False
         )
@@ -61,89 +156,217 @@ def run_command(cmd: List[str], capture_output: bool = True) -> subprocess.Compl
 
 def is_in_virtual_env() -> bool:
     """Checks if running in a virtual environment."""
-    return hasattr(sys, 'real_prefix') or (
-        hasattr(sys, 'base_prefix') and sys.base_prefix != sys.prefix
-    )
+    return IN_VENV
 
 
 def get_installed_packages() -> Dict[str, str]:
     """Gets list of installed packages with versions."""
-    result = run_command(['pip', 'list', '--format=json'])
-    if result and result.returncode == 0:
-        try:
-            packages = json.loads(result.stdout)
-            return {pkg['name'].lower(): pkg['version'] for pkg in packages}
-        except json.JSONDecodeError:
-            print("Error decoding package list")
-            return {}
-    return {}
+    global _installed_cache
+    if _installed_cache is None:
+        fingerprint = _get_environment_fingerprint()
+        packages = _load_cached_packages(fingerprint)
+        if packages is None:
+            packages = {}
+            for dist in distributions():
+                name = dist.metadata['Name']
+                # Skip broken installs without a name; like pip, the first
+                # distribution found on sys.path wins
+                if name:
+                    packages.setdefault(name.lower(), dist.version)
+            _save_cached_packages(fingerprint, packages)
+        _installed_cache = packages
+    return dict(_installed_cache)
 
 
-def get_removable_packages(all_packages: Dict[str, str]) -> List[str]:
+def get_removable_packages(all_packages: Dict[str, str], protected_lower: FrozenSet[str]) -> List[str]:
     """Identifies packages that can be safely removed."""
-    removable = []
-    protected_packages = get_protected_packages()
-    protected_lower = {pkg.lower() for pkg in protected_packages}
-    
-    for package_name in all_packages.keys():
-        if package_name not in protected_lower:
-            removable.append(package_name)
-    
-    return sorted(removable)
+    return sorted(all_packages.keys() - protected_lower)
+
+
+def _print_package_list(names: List[str], packages: Dict[str, str]) -> None:
+    """Prints one bullet per package with a single write instead of N prints."""
+    if not names:
+        return
+    lines = [f"  • {pkg} ({packages.get(pkg, 'unknown')})" for pkg in names]
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 
-def show_package_info(packages: Dict[str, str], removable: List[str]):
+def show_package_info(packages: Dict[str, str], removable: List[str], protected_lower: FrozenSet[str]):
     """Shows information about packages."""
-    print(f"\n{'='*60}")
+    print(f"\n{_SEP}")
     print(f"PACKAGE ANALYSIS")
-    print(f"{'='*60}")
+    print(_SEP)
     print(f"Total installed packages: {len(packages)}")
     print(f"Protected packages (will not be removed): {len(packages) - len(removable)}")
     print(f"Packages that can be removed: {len(removable)}")
     
     if removable:
         print(f"\n{'Packages to be removed:'}")
-        print(f"{'-'*40}")
-        for pkg in removable:
-            version = packages.get(pkg, 'unknown')
-            print(f"  • {pkg} ({version})")
+        print(_SUBSEP)
+        _print_package_list(removable, packages)
     
     print(f"\n{'Protected packages (kept):'}")
-    print(f"{'-'*40}")
-    protected_packages = get_protected_packages()
+    print(_SUBSEP)
     protected_installed = [
         pkg for pkg in packages.keys() 
-        if pkg in {p.lower() for p in protected_packages}
+        if pkg in protected_lower
     ]
-    for pkg in sorted(protected_installed):
-        version = packages.get(pkg, 'unknown')
-        print(f"  • {pkg} ({version})")
+    _print_package_list(sorted(protected_installed), packages)
 
 
-def remove_packages(packages: List[str], batch_size: int = 10) -> bool:
-    """Remove packages in batches to avoid dependency issues."""
+def _normalize_name(name: str) -> str:
+    """Normalizes a package name so pip list and pip show spellings match."""
+    return name.lower().replace('_', '-').replace('.', '-')
+
+
+def _partition_shared_packages(packages: List[str]) -> Tuple[List[str], List[str]]:
+    """Splits packages into ones with disjoint install paths and shared ones."""
+    output = []
+    for chunk in _chunk_by_command_length(PIP_CMD + ['show', '-f'], packages):
+        result = run_command(PIP_CMD + ['show', '-f'] + chunk)
+        if result and result.stdout:
+            output.append(result.stdout)
+    
+    roots_by_package: Dict[str, Set[str]] = {}
+    name = None
+    in_files = False
+    for line in '\n'.join(output).splitlines():
+        if line.startswith('Name:'):
+            name = _normalize_name(line.split(':', 1)[1].strip())
+            roots_by_package[name] = set()
+            in_files = False
+        elif line.startswith('Files:'):
+            in_files = True
+        elif line == '---':
+            in_files = False
+        elif in_files and name and line.startswith('  '):
+            path = line.strip().replace('\\', '/')
+            top = path.split('/', 1)[0]
+            # Scripts outside site-packages and bytecode caches are compared per file
+            roots_by_package[name].add(path if top in ('..', '__pycache__') else top)
+    
+    owners: Dict[str, int] = {}
+    for roots in roots_by_package.values():
+        for root in roots:
+            owners[root] = owners.get(root, 0) + 1
+    
+    independent, shared = [], []
+    for package in packages:
+        roots = roots_by_package.get(_normalize_name(package))
+        if roots and all(owners[root] == 1 for root in roots):
+            independent.append(package)
+        else:
+            shared.append(package)
+    return independent, shared
+
+
+def _max_command_length() -> int:
+    """Returns how long a single command line may safely get."""
+    if os.name == 'nt':
+        return 32767 - 1024  # CreateProcess limit, minus some headroom
+    try:
+        arg_max = os.sysconf('SC_ARG_MAX')
+    except (AttributeError, ValueError, OSError):
+        arg_max = -1
+    if arg_max <= 0:
+        arg_max = 131072
+    # ARG_MAX also has to hold the environment of the child process
+    env_size = sum(len(key) + len(value) + 2 for key, value in os.environ.items())
+    return arg_max - env_size - 4096
+
+
+def _chunk_by_command_length(base_cmd: List[str], args: List[str]) -> List[List[str]]:
+    """Splits args into as few chunks as fit on a command line after base_cmd."""
+    limit = _max_command_length()
+    base_length = sum(len(part) + 1 for part in base_cmd)
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    length = base_length
+    for arg in args:
+        if current and length + len(arg) + 1 > limit:
+            chunks.append(current)
+            current, length = [], base_length
+        current.append(arg)
+        length += len(arg) + 1
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _uninstall_batch(batch: List[str]) -> Optional[subprocess.CompletedProcess]:
+    """Runs a single line-buffered `pip uninstall` for the given batch."""
+    cmd = PIP_CMD + ['uninstall', '-y'] + batch
+    env = {**os.environ, 'PYTHONUNBUFFERED': '1'}
+    return run_command(cmd, capture_output=False, env=env)
+
+
+def remove_packages(packages: List[str], jobs: int = 1) -> bool:
+    """Remove packages using as few pip invocations as possible."""
     if not packages:
-        print("No packages to remove.")
+        print("No packages to remove.", flush=True)
         return True
     
-    print(f"\nStarting removal of {len(packages)} packages...")
+    print(f"\nStarting removal of {len(packages)} packages...", flush=True)
     
-    # Remove in batches
-    for i in range(0, len(packages), batch_size):
-        batch = packages[i:i + batch_size]
-        print(f"\nRemoving batch {i//batch_size + 1}: {', '.join(batch)}")
+    uninstall_cmd = PIP_CMD + ['uninstall', '-y']
+    shared: List[str] = []
+    
+    if jobs <= 1:
+        for batch in _chunk_by_command_length(uninstall_cmd, packages):
+            result = _uninstall_batch(batch)
+            if result and result.returncode != 0:
+                print(f"Error removing some packages. Continuing...", flush=True)
+    else:
+        # Concurrent uninstalls must not touch the same files
+        independent, shared = _partition_shared_packages(packages)
+        batches: List[List[str]] = []
+        for worker in range(jobs):
+            batches.extend(_chunk_by_command_length(uninstall_cmd, independent[worker::jobs]))
+        for number, batch in enumerate(batches, 1):
+            print(f"\nRemoving batch {number}: {len(batch)} packages", flush=True)
         
-        cmd = ['pip', 'uninstall', '-y'] + batch
-        result = run_command(cmd, capture_output=False)
+        # Each batch spends its time in a pip subprocess, so threads are enough
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_uninstall_batch, batches))
         
-        if result and result.returncode != 0:
-            print(f"Error removing some packages from batch. Continuing...")
+        for number, result in enumerate(results, 1):
+            if result and result.returncode != 0:
+                print(f"Error removing some packages from batch {number}. Continuing...", flush=True)
     
-    print("\nRemoval completed!")
+    # Packages sharing install paths go last, one pip call at a time
+    if shared:
+        print(f"\nRemoving packages with shared files: {', '.join(shared)}", flush=True)
+        for batch in _chunk_by_command_length(uninstall_cmd, shared):
+            result = _uninstall_batch(batch)
+            if result and result.returncode != 0:
+                print(f"Error removing some packages with shared files. Continuing...", flush=True)
+    
+    # The environment changed; later lookups must rescan it
+    _invalidate_installed_packages()
+    
+    print("\nRemoval completed!", flush=True)
     return True
 
 
-def cleanup_local_packages(confirm: bool = False):
+def _prompt_while_warming_pip(prompt: str) -> str:
+    """Asks the user for input while pip's uninstall modules load in the background."""
+    try:
+        warm_up = subprocess.Popen(
+            [sys.executable, '-c', 'import pip._internal.commands.uninstall'],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+    except OSError:
+        warm_up = None
+    try:
+        return input(prompt)
+    finally:
+        if warm_up:
+            warm_up.wait()
+
+
+def cleanup_local_packages(confirm: bool = False, jobs: int = 1):
     """Remove packages from current virtual environment."""
     if not is_in_virtual_env():
         print("❌ WARNING: You are not in a virtual environment!")
@@ -155,24 +378,25 @@ def cleanup_local_packages(confirm: bool = False):
     print(f"Environment: {sys.prefix}")
     
     packages = get_installed_packages()
-    removable = get_removable_packages(packages)
+    protected_lower = get_protected_packages()
+    removable = get_removable_packages(packages, protected_lower)
     
-    show_package_info(packages, removable)
+    show_package_info(packages, removable, protected_lower)
     
     if not removable:
         print("\n✅ No non-essential packages found to remove.")
         return True
     
     if not confirm:
-        response = input(f"\nDo you want to remove {len(removable)} packages? (y/N): ").lower()
+        response = _prompt_while_warming_pip(f"\nDo you want to remove {len(removable)} packages? (y/N): ").lower()
         if response not in ['s', 'sim', 'y', 'yes']:
             print("Operation cancelled.")
             return False
     
-    return remove_packages(removable)
+    return remove_packages(removable, jobs)
 
 
-def cleanup_global_packages(confirm: bool = False):
+def cleanup_global_packages(confirm: bool = False, jobs: int = 1):
     """Remove packages from global Python installation."""
     if is_in_virtual_env():
         print("❌ WARNING: You are in a virtual environment!")
@@ -185,9 +409,10 @@ def cleanup_global_packages(confirm: bool = False):
     print("This will affect all projects that don't use virtual environments.")
     
     packages = get_installed_packages()
-    removable = get_removable_packages(packages)
+    protected_lower = get_protected_packages()
+    removable = get_removable_packages(packages, protected_lower)
     
-    show_package_info(packages, removable)
+    show_package_info(packages, removable, protected_lower)
     
     if not removable:
         print("\n✅ No non-essential packages found to remove.")
@@ -196,27 +421,56 @@ def cleanup_global_packages(confirm: bool = False):
     if not confirm:
         print("\n⚠️  WARNING: This operation may affect other projects!")
         print("Make sure you know what you're doing.")
-        response = input(f"\nConfirm removal of {len(removable)} packages GLOBALLY? (y/N): ").lower()
+        response = _prompt_while_warming_pip(f"\nConfirm removal of {len(removable)} packages GLOBALLY? (y/N): ").lower()
         if response not in ['s', 'sim', 'y', 'yes']:
             print("Operation cancelled.")
             return False
     
-    return remove_packages(removable)
+    return remove_packages(removable, jobs)
+
+
+async def _get_pip_version() -> str:
+    """Runs `pip --version` without blocking the event loop."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *PIP_CMD, '--version',
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, _ = await process.communicate()
+    except OSError as e:
+        print(f"Error executing command {' '.join(PIP_CMD + ['--version'])}: {e}")
+        return 'unknown'
+    version = stdout.decode().strip()
+    if process.returncode != 0 or not version:
+        return 'unknown'
+    return version
+
+
+async def _collect_environment_info() -> Tuple[str, Dict[str, str]]:
+    """Gets pip version while the installed packages are scanned."""
+    loop = asyncio.get_running_loop()
+    pip_version, packages = await asyncio.gather(
+        _get_pip_version(),
+        loop.run_in_executor(None, get_installed_packages)
+    )
+    return pip_version, packages
 
 
 def show_environment_info():
     """Shows information about the current environment."""
-    print(f"{'='*60}")
+    print(_SEP)
     print(f"ENVIRONMENT INFORMATION")
-    print(f"{'='*60}")
+    print(_SEP)
     print(f"Python: {sys.version}")
     print(f"Executable: {sys.executable}")
     print(f"Virtual environment: {'Yes' if is_in_virtual_env() else 'No'}")
     if is_in_virtual_env():
         print(f"Venv path: {sys.prefix}")
-    print(f"Pip version: {run_command(['pip', '--version']).stdout.strip()}")
     
-    packages = get_installed_packages()
+    pip_version, packages = asyncio.run(_collect_environment_info())
+    print(f"Pip version: {pip_version}")
     print(f"Total packages: {len(packages)}")
 
 
@@ -230,6 +484,7 @@ Usage examples:
   python cleanup_packages.py --local                   # Clean virtual environment
   python cleanup_packages.py --global --confirm        # Clean global installation
   python cleanup_packages.py --dry-run                 # See what would be removed
+  python cleanup_packages.py --local --jobs 4          # Uninstall with 4 parallel pip calls
         """
     )
     
@@ -243,9 +498,14 @@ Usage examples:
                        help='Show only environment information')
     parser.add_argument('--dry-run', action='store_true', 
                        help='Show what would be done without executing')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N',
+                       help='Run up to N pip uninstall processes in parallel (default: 1)')
     
     args = parser.parse_args()
     
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    
     if args.info:
         show_environment_info()
         return
@@ -253,14 +513,15 @@ Usage examples:
     if args.dry_run:
         print("🔍 DRY-RUN MODE - No changes will be made")
         packages = get_installed_packages()
-        removable = get_removable_packages(packages)
-        show_package_info(packages, removable)
+        protected_lower = get_protected_packages()
+        removable = get_removable_packages(packages, protected_lower)
+        show_package_info(packages, removable, protected_lower)
         return
     
     if args.local:
-        success = cleanup_local_packages(args.confirm)
+        success = cleanup_local_packages(args.confirm, args.jobs)
     elif getattr(args, 'global'):
-        success = cleanup_global_packages(args.confirm)
+        success = cleanup_global_packages(args.confirm, args.jobs)
     else:
         parser.print_help()
         return
@@ -0,0 +1,129 @@
+"""Tests for scripts/cleanup_packages.py."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import cleanup_packages  # noqa: E402
+
+
+def _pip_show(stdout: str) -> subprocess.CompletedProcess:
+    """Builds a fake `pip show -f` result."""
+    return subprocess.CompletedProcess(args=[], returncode=0, stdout=stdout, stderr='')
+
+
+class PartitionSharedPackagesTest(unittest.TestCase):
+    """Tests for _partition_shared_packages."""
+
+    def partition(self, packages, stdout):
+        with mock.patch.object(cleanup_packages, 'run_command', return_value=_pip_show(stdout)):
+            return cleanup_packages._partition_shared_packages(packages)
+
+    def test_disjoint_packages_are_independent(self):
+        stdout = (
+            "Name: alpha\n"
+            "Version: 1.0\n"
+            "Files:\n"
+            "  alpha/__init__.py\n"
+            "  alpha-1.0.dist-info/RECORD\n"
+            "---\n"
+            "Name: beta\n"
+            "Version: 1.0\n"
+            "Files:\n"
+            "  beta.py\n"
+            "  __pycache__/beta.cpython-311.pyc\n"
+            "  ../../../bin/beta\n"
+        )
+        self.assertEqual(self.partition(['alpha', 'beta'], stdout), (['alpha', 'beta'], []))
+
+    def test_packages_sharing_a_namespace_are_shared(self):
+        stdout = (
+            "Name: ns-a\n"
+            "Files:\n"
+            "  ns/a/__init__.py\n"
+            "---\n"
+            "Name: ns-b\n"
+            "Files:\n"
+            "  ns/b/__init__.py\n"
+            "---\n"
+            "Name: gamma\n"
+            "Files:\n"
+            "  gamma/__init__.py\n"
+        )
+        self.assertEqual(
+            self.partition(['ns-a', 'ns-b', 'gamma'], stdout),
+            (['gamma'], ['ns-a', 'ns-b'])
+        )
+
+    def test_package_without_file_list_is_shared(self):
+        stdout = (
+            "Name: legacy\n"
+            "Version: 0.1\n"
+            "Files:\n"
+            "Cannot locate RECORD or installed-files.txt\n"
+            "---\n"
+            "Name: other\n"
+            "Files:\n"
+            "  other/__init__.py\n"
+        )
+        self.assertEqual(self.partition(['legacy', 'other'], stdout), (['other'], ['legacy']))
+
+    def test_package_unknown_to_pip_is_shared(self):
+        stdout = (
+            "Name: known\n"
+            "Files:\n"
+            "  known/__init__.py\n"
+        )
+        self.assertEqual(self.partition(['known', 'missing'], stdout), (['known'], ['missing']))
+
+    def test_names_are_matched_after_normalization(self):
+        stdout = (
+            "Name: Typing_Extensions\n"
+            "Files:\n"
+            "  typing_extensions.py\n"
+        )
+        self.assertEqual(
+            self.partition(['typing-extensions'], stdout),
+            (['typing-extensions'], [])
+        )
+
+
+class LoadCachedPackagesTest(unittest.TestCase):
+    """Tests for _load_cached_packages."""
+
+    def load(self, cache):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_file = os.path.join(tmp_dir, 'cache.json')
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            with mock.patch.object(cleanup_packages, 'CACHE_FILE', cache_file):
+                return cleanup_packages._load_cached_packages([['/site', 1]])
+
+    def entry(self, packages, fingerprint=None):
+        return {sys.prefix: {'fingerprint': fingerprint or [['/site', 1]], 'packages': packages}}
+
+    def test_matching_entry_is_returned(self):
+        self.assertEqual(self.load(self.entry({'alpha': '1.0'})), {'alpha': '1.0'})
+
+    def test_stale_fingerprint_is_a_miss(self):
+        self.assertIsNone(self.load(self.entry({'alpha': '1.0'}, [['/site', 2]])))
+
+    def test_malformed_entries_are_a_miss(self):
+        for cache in (
+            [1, 2],
+            {sys.prefix: []},
+            self.entry([1]),
+            self.entry({'alpha': 1}),
+        ):
+            with self.subTest(cache=cache):
+                self.assertIsNone(self.load(cache))
+
+
+if __name__ == '__main__':
+    unittest.main()